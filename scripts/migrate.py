@@ -6,31 +6,112 @@ Database Migration Script for ConnectifyVPN Premium Suite
 """
 
 import asyncio
+import enum
+import json
 import os
 import sys
+from functools import cached_property
+from ipaddress import ip_address
 from pathlib import Path
 
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
-from alembic.config import Config
-from alembic import command
+from sqlalchemy import JSON, insert, text
 
-from core.config import Settings
-from core.database import DatabaseManager
-from core.models import Base
+from core.config import get_settings
+from core.database import DatabaseManager, DatabaseUtils
+
+try:
+    import liburing
+except ImportError:  # optional: io_uring backed backup writes (Linux only)
+    liburing = None
+
+
+BACKUP_CHUNK_SIZE = 1024 * 1024
+
+# Seed batches at least this large are loaded with COPY instead of INSERT
+COPY_THRESHOLD = 100
+
+# Seed server addresses, validated once at import time
+SEED_SERVER_IPS = tuple(str(ip_address(ip)) for ip in ("1.2.3.4", "2.3.4.5", "3.4.5.6"))
+
+# Shared by every seeded server; the inserts only read it
+DEFAULT_SERVER_CONFIG = {
+    "vless_tls_port": 443,
+    "vless_ntls_port": 80,
+    "vmess_tls_port": 8443,
+    "vmess_ntls_port": 8080,
+    "trojan_port": 8443
+}
+
+
+async def confirm(prompt: str) -> bool:
+    """Ask for a yes/no confirmation without blocking the event loop"""
+    answer = await asyncio.to_thread(input, prompt)
+    return answer.strip().lower() == 'yes'
+
+
+class IoUringFileWriter:
+    """Appends chunks to a file through io_uring, keeping several writes in flight"""
+    
+    def __init__(self, path: str, queue_depth: int = 64):
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        self.ring = liburing.io_uring()
+        self.cqe = liburing.io_uring_cqe()
+        self.queue_depth = queue_depth
+        self.offset = 0
+        # Submitted buffers must stay referenced until their completion is reaped
+        self.pending = []
+        liburing.io_uring_queue_init(queue_depth, self.ring, 0)
+        
+    def write(self, chunk: bytes):
+        """Queue a write at the current end of file"""
+        if len(self.pending) >= self.queue_depth:
+            self.flush()
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        liburing.io_uring_prep_write(sqe, self.fd, chunk, len(chunk), self.offset)
+        liburing.io_uring_submit(self.ring)
+        self.pending.append(chunk)
+        self.offset += len(chunk)
+        
+    def flush(self):
+        """Wait for every in-flight write to complete"""
+        expected = sum(len(chunk) for chunk in self.pending)
+        written = 0
+        for _ in range(len(self.pending)):
+            liburing.io_uring_wait_cqe(self.ring, self.cqe)
+            written += liburing.trap_error(self.cqe.res)
+            liburing.io_uring_cqe_seen(self.ring, self.cqe)
+        self.pending.clear()
+        if written != expected:
+            raise OSError(f"Short write: {written} of {expected} bytes")
+            
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            liburing.io_uring_queue_exit(self.ring)
+            os.close(self.fd)
 
 
 class MigrationManager:
     """Manages database migrations"""
     
     def __init__(self):
-        self.settings = Settings()
+        self.settings = get_settings()
         self.db = DatabaseManager(self.settings)
         
+    @cached_property
+    def alembic_cfg(self):
+        """Alembic config with absolute paths, parsed once"""
+        from alembic.config import Config
+        
+        project_dir = Path(__file__).parent.parent
+        cfg = Config(str(project_dir / "alembic.ini"))
+        cfg.set_main_option("script_location", str(project_dir / "alembic"))
+        return cfg
+        
     async def initialize(self):
         """Initialize database connection"""
         await self.db.initialize()
@@ -43,8 +124,7 @@ class MigrationManager:
         
     async def drop_tables(self):
         """Drop all database tables (DANGEROUS!)"""
-        confirm = input("⚠️  This will DELETE ALL DATA! Are you sure? (yes/no): ")
-        if confirm.lower() == 'yes':
+        if await confirm("⚠️  This will DELETE ALL DATA! Are you sure? (yes/no): "):
             print("🗑️  Dropping all tables...")
             await self.db.drop_tables()
             print("✅ Tables dropped successfully")
@@ -54,19 +134,26 @@ class MigrationManager:
     async def check_connection(self):
         """Check database connection"""
         print("🔍 Checking database connection...")
-        health = await self.db.health_check()
         
-        if health.get('postgres'):
-            print("✅ PostgreSQL connection successful")
-        else:
-            print("❌ PostgreSQL connection failed")
+        async def probe(name, ping):
+            return name, await ping()
             
-        if health.get('redis'):
-            print("✅ Redis connection successful")
-        else:
-            print("❌ Redis connection failed")
+        probes = [
+            probe("PostgreSQL", self.db.ping_postgres),
+            probe("Redis", self.db.ping_redis),
+        ]
+        
+        # Report each probe as soon as it finishes
+        healthy = True
+        for finished in asyncio.as_completed(probes):
+            name, ok = await finished
+            if ok:
+                print(f"✅ {name} connection successful")
+            else:
+                print(f"❌ {name} connection failed")
+            healthy = healthy and ok
             
-        return all(health.values())
+        return healthy
         
     async def get_stats(self):
         """Get database statistics"""
@@ -84,14 +171,19 @@ class MigrationManager:
         
         from core.models import Plan, PlanType, Server, ServerStatus
         
-        async with self.db.get_session() as session:
-            # Check if data already exists
-            plan_count = await session.execute(
-                text("SELECT COUNT(*) FROM plans WHERE is_active = true")
+        payment = self.settings.payment
+        
+        async with self.db.session_scope() as session:
+            # Check if data already exists (plans and servers in one query),
+            # sent straight to asyncpg so its statement cache is reused
+            conn = await session.connection()
+            raw = await conn.get_raw_connection()
+            existing = await raw.driver_connection.fetchrow(
+                "SELECT EXISTS (SELECT 1 FROM plans WHERE is_active = true) AS has_plans, "
+                "EXISTS (SELECT 1 FROM servers) AS has_servers"
             )
-            plan_count = plan_count.scalar()
             
-            if plan_count > 0:
+            if existing["has_plans"]:
                 print("⚠️  Database already contains data. Skipping seed.")
                 return
                 
@@ -101,9 +193,9 @@ class MigrationManager:
                     "name": "Trial",
                     "description": "3-day trial with limited features",
                     "type": PlanType.TRIAL,
-                    "price": self.settings.payment.trial_price,
-                    "duration_days": self.settings.payment.trial_days,
-                    "device_limit": self.settings.payment.trial_device_limit,
+                    "price": payment.trial_price,
+                    "duration_days": payment.trial_days,
+                    "device_limit": payment.trial_device_limit,
                     "features": {
                         "highlights": [
                             "3 days access",
@@ -119,13 +211,13 @@ class MigrationManager:
                     "name": "Premium",
                     "description": "Full premium access for 365 days",
                     "type": PlanType.PREMIUM,
-                    "price": self.settings.payment.full_price,
-                    "duration_days": self.settings.payment.full_days,
-                    "device_limit": self.settings.payment.full_device_limit,
+                    "price": payment.full_price,
+                    "duration_days": payment.full_days,
+                    "device_limit": payment.full_device_limit,
                     "features": {
                         "highlights": [
                             "365 days access",
-                            f"{self.settings.payment.full_device_limit} devices",
+                            f"{payment.full_device_limit} devices",
                             "Priority support",
                             "All protocols",
                             "Global servers",
@@ -137,159 +229,248 @@ class MigrationManager:
                 }
             ]
             
-            for plan_data in plans:
-                plan = Plan(**plan_data)
-                session.add(plan)
-                
+            await session.execute(insert(Plan), plans)
             await session.commit()
             print(f"✅ Created {len(plans)} default plans")
             
             # Create default servers (if not exists)
-            server_count = await session.execute(
-                text("SELECT COUNT(*) FROM servers")
-            )
-            server_count = server_count.scalar()
-            
-            if server_count == 0:
+            if not existing["has_servers"]:
                 servers = [
                     {
                         "name": "SG-01",
                         "hostname": "sg01.yourdomain.com",
-                        "ip_address": "1.2.3.4",
+                        "ip_address": SEED_SERVER_IPS[0],
                         "location": "Singapore",
                         "capacity": 20,
                         "cpu_cores": 4,
                         "memory_gb": 8,
                         "bandwidth_gb": 1000,
                         "status": ServerStatus.ONLINE,
-                        "config": {
-                            "vless_tls_port": 443,
-                            "vless_ntls_port": 80,
-                            "vmess_tls_port": 8443,
-                            "vmess_ntls_port": 8080,
-                            "trojan_port": 8443
-                        }
+                        "config": DEFAULT_SERVER_CONFIG
                     },
                     {
                         "name": "SG-02",
                         "hostname": "sg02.yourdomain.com",
-                        "ip_address": "2.3.4.5",
+                        "ip_address": SEED_SERVER_IPS[1],
                         "location": "Singapore",
                         "capacity": 20,
                         "cpu_cores": 4,
                         "memory_gb": 8,
                         "bandwidth_gb": 1000,
                         "status": ServerStatus.ONLINE,
-                        "config": {
-                            "vless_tls_port": 443,
-                            "vless_ntls_port": 80,
-                            "vmess_tls_port": 8443,
-                            "vmess_ntls_port": 8080,
-                            "trojan_port": 8443
-                        }
+                        "config": DEFAULT_SERVER_CONFIG
                     },
                     {
                         "name": "US-01",
                         "hostname": "us01.yourdomain.com",
-                        "ip_address": "3.4.5.6",
+                        "ip_address": SEED_SERVER_IPS[2],
                         "location": "United States",
                         "capacity": 25,
                         "cpu_cores": 6,
                         "memory_gb": 12,
                         "bandwidth_gb": 2000,
                         "status": ServerStatus.ONLINE,
-                        "config": {
-                            "vless_tls_port": 443,
-                            "vless_ntls_port": 80,
-                            "vmess_tls_port": 8443,
-                            "vmess_ntls_port": 8080,
-                            "trojan_port": 8443
-                        }
+                        "config": DEFAULT_SERVER_CONFIG
                     }
                 ]
                 
-                for server_data in servers:
-                    server = Server(**server_data)
-                    session.add(server)
-                    
+                if len(servers) >= COPY_THRESHOLD:
+                    await self._copy_rows(session, Server, servers)
+                else:
+                    await session.execute(insert(Server), servers)
                 await session.commit()
                 print(f"✅ Created {len(servers)} default servers")
                 
+    async def _copy_rows(self, session, model, rows):
+        """Bulk load rows with asyncpg's binary COPY protocol"""
+        # COPY bypasses SQLAlchemy, so fill in scalar column defaults and
+        # encode enum/JSON values the way the column types expect them
+        table = model.__table__
+        columns = [
+            column for column in table.columns
+            if column.name in rows[0] or (column.default is not None and column.default.is_scalar)
+        ]
+        
+        def encode(column, row):
+            value = row.get(column.name, column.default.arg if column.default is not None else None)
+            if isinstance(value, enum.Enum):
+                return value.name
+            if isinstance(column.type, JSON):
+                return json.dumps(value)
+            return value
+            
+        records = [tuple(encode(column, row) for column in columns) for row in rows]
+        
+        conn = await session.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name, records=records, columns=[column.name for column in columns]
+        )
+        
     async def create_indexes(self):
         """Create database indexes for performance"""
         print("📈 Creating database indexes...")
         
+        # Single-column user_id/account_id indexes are omitted: the model's
+        # (user_id, ...) and (account_id, ...) composites serve as their prefix.
         indexes = [
             # User indexes
-            "CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users(telegram_id)",
-            "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)",
-            "CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_telegram_id ON users(telegram_id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_email ON users(email)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_status ON users(status)",
             
             # Account indexes
-            "CREATE INDEX IF NOT EXISTS idx_accounts_user_id ON accounts(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_accounts_server_id ON accounts(server_id)",
-            "CREATE INDEX IF NOT EXISTS idx_accounts_status ON accounts(status)",
-            "CREATE INDEX IF NOT EXISTS idx_accounts_expires_at ON accounts(expires_at)",
-            "CREATE INDEX IF NOT EXISTS idx_accounts_user_status ON accounts(user_id, status)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_accounts_server_id ON accounts(server_id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_accounts_status ON accounts(status)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_accounts_expires_at_unexpired "
+            "ON accounts(expires_at) INCLUDE (user_id, status) WHERE status != 'EXPIRED'",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_accounts_user_id_status ON accounts(user_id, status)",
             
             # Order indexes
-            "CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status)",
-            "CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at)",
-            "CREATE INDEX IF NOT EXISTS idx_orders_user_status ON orders(user_id, status)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_status ON orders(status)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_created_at ON orders(created_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_user_id_status ON orders(user_id, status)",
             
             # VPN Session indexes
-            "CREATE INDEX IF NOT EXISTS idx_vpn_sessions_account_id ON vpn_sessions(account_id)",
-            "CREATE INDEX IF NOT EXISTS idx_vpn_sessions_is_active ON vpn_sessions(is_active)",
-            "CREATE INDEX IF NOT EXISTS idx_vpn_sessions_created_at ON vpn_sessions(created_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_vpn_sessions_active "
+            "ON vpn_sessions(account_id) WHERE is_active = true",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_vpn_sessions_created_at ON vpn_sessions(created_at)",
             
             # Ticket indexes
-            "CREATE INDEX IF NOT EXISTS idx_tickets_user_id ON tickets(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status)",
-            "CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets(created_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_status ON tickets(status)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_created_at ON tickets(created_at)",
             
             # Audit log indexes
-            "CREATE INDEX IF NOT EXISTS idx_audit_logs_user_id ON audit_logs(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_audit_logs_event_type ON audit_logs(event_type)",
-            "CREATE INDEX IF NOT EXISTS idx_audit_logs_created_at ON audit_logs(created_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_logs_event_type ON audit_logs(event_type)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_logs_created_at ON audit_logs(created_at)",
+        ]
+        
+        # Indexes replaced by the composites/partial indexes above (or
+        # duplicating the model's composites under another name), including
+        # the ix_* ones create_all used to build from index=True columns
+        replaced = [
+            "idx_accounts_user_id",
+            "idx_accounts_user_status",
+            "idx_orders_user_id",
+            "idx_orders_user_status",
+            "idx_accounts_expires_at",
+            "idx_vpn_sessions_account_id",
+            "idx_vpn_sessions_is_active",
+            "idx_tickets_user_id",
+            "idx_audit_logs_user_id",
+            "ix_accounts_user_id",
+            "ix_orders_user_id",
+            "ix_accounts_expires_at",
+            "ix_vpn_sessions_account_id",
+            "ix_tickets_user_id",
+            "ix_audit_logs_user_id",
         ]
         
-        async with self.db.engine.begin() as conn:
-            for index_sql in indexes:
-                await conn.execute(text(index_sql))
+        # CONCURRENTLY cannot run inside a transaction block, so every index
+        # gets its own AUTOCOMMIT connection and the builds run in parallel,
+        # bounded by the pool size.
+        limit = asyncio.Semaphore(self.settings.database.pool_size)
+        
+        async def _run(sql: str):
+            async with limit:
+                async with self.db.engine.connect() as conn:
+                    await conn.execution_options(isolation_level="AUTOCOMMIT").execute(
+                        text(sql)
+                    )
+                    
+        # Look up which valid indexes already exist in one catalog query and
+        # only send DDL for the missing ones
+        names = [index_sql.split(" IF NOT EXISTS ", 1)[1].split()[0] for index_sql in indexes]
+        validity = await DatabaseUtils.get_index_validity(self.db, names)
+        existing = {name for name, valid in validity.items() if valid}
+        # A failed CONCURRENTLY build leaves an INVALID index that IF NOT
+        # EXISTS would skip forever, so drop it and build it again
+        invalid = {name for name, valid in validity.items() if not valid}
+        
+        async def _build(name: str, index_sql: str):
+            if name in invalid:
+                await _run(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            await _run(index_sql)
+            
+        missing = [
+            (name, index_sql) for name, index_sql in zip(names, indexes) if name not in existing
+        ]
+        # TaskGroup cancels the remaining builds as soon as one fails
+        async with asyncio.TaskGroup() as tg:
+            for name, index_sql in missing:
+                tg.create_task(_build(name, index_sql))
                 
-        print("✅ Database indexes created")
+        # Only drop the old indexes once their replacements are built
+        async with asyncio.TaskGroup() as tg:
+            for name in replaced:
+                tg.create_task(_run(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                
+        print(
+            f"✅ Database indexes created ({len(missing) - len(invalid)} new, "
+            f"{len(invalid)} rebuilt, {len(existing)} existing)"
+        )
         
     async def migrate(self):
         """Run Alembic migrations"""
         print("🚀 Running Alembic migrations...")
         
-        # Change to project directory
-        os.chdir(Path(__file__).parent.parent)
-        
-        # Create alembic config
-        alembic_cfg = Config("alembic.ini")
+        from alembic import command
         
-        # Run migrations
-        command.upgrade(alembic_cfg, "head")
+        # Alembic is synchronous; run it in a worker thread
+        await asyncio.to_thread(command.upgrade, self.alembic_cfg, "head")
         
         print("✅ Migrations completed")
         
     async def backup(self, backup_path: str = None):
-        """Create database backup"""
+        """Create database backup in the backup_path directory"""
         if not backup_path:
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = f"/tmp/connectifyvpn_backup_{timestamp}.dump"
+            backup_path = "/tmp"
             
-        print(f"💾 Creating backup at {backup_path}...")
+        print(f"💾 Creating backup in {backup_path}...")
         
         try:
-            backup_file = await self.db.backup_database(backup_path)
+            if liburing is not None:
+                backup_file = await self._stream_backup(backup_path)
+            else:
+                backup_file = await self.db.backup_database(backup_path)
             print(f"✅ Backup created: {backup_file}")
         except Exception as e:
             print(f"❌ Backup failed: {e}")
             
+    async def _stream_backup(self, backup_path: str) -> str:
+        """Pipe pg_dump (custom format) straight into an io_uring writer"""
+        # Same file naming and pg_dump arguments as DatabaseManager.backup_database
+        filepath = self.db.backup_file_path(backup_path)
+        process = await asyncio.create_subprocess_exec(
+            *self.db.pg_dump_command(),
+            env=self.db.pg_client_env(),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stderr = asyncio.create_task(process.stderr.read())
+        
+        try:
+            writer = IoUringFileWriter(str(filepath))
+            try:
+                while chunk := await process.stdout.read(BACKUP_CHUNK_SIZE):
+                    writer.write(chunk)
+            finally:
+                writer.close()
+                
+            await process.wait()
+            if process.returncode != 0:
+                raise Exception(f"Backup failed: {(await stderr).decode(errors='ignore')}")
+        except BaseException:
+            # Don't leave pg_dump running or a truncated dump on disk
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            stderr.cancel()
+            filepath.unlink(missing_ok=True)
+            raise
+            
+        return str(filepath)
+        
     async def restore(self, backup_path: str):
         """Restore database from backup"""
         if not os.path.exists(backup_path):
@@ -298,8 +479,7 @@ class MigrationManager:
             
         print(f"🔄 Restoring from {backup_path}...")
         
-        confirm = input("⚠️  This will OVERWRITE current data! Are you sure? (yes/no): ")
-        if confirm.lower() != 'yes':
+        if not await confirm("⚠️  This will OVERWRITE current data! Are you sure? (yes/no): "):
             print("❌ Restore cancelled")
             return
             
@@ -379,4 +559,10 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            runner.run(main())
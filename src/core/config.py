@@ -7,10 +7,11 @@ import json
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass, field
-from dotenv import load_dotenv
+from functools import lru_cache
+from operator import attrgetter
 
 
-@dataclass
+@dataclass(slots=True)
 class DatabaseConfig:
     """Database configuration"""
     host: str = "localhost"
@@ -21,17 +22,28 @@ class DatabaseConfig:
     ssl_mode: str = "prefer"
     pool_size: int = 20
     max_overflow: int = 30
+    use_pgbouncer: bool = False  # Pooling is left to an external PgBouncer
+    backup_compression: str = ""  # pg_dump --compress value, e.g. "lz4" (empty: pg_dump default)
     
-    @property
-    def dsn(self) -> str:
-        return (
+    # Formatted once in __post_init__
+    _dsn: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._dsn = (
             f"postgresql+asyncpg://{self.user}:{self.password}"
             f"@{self.host}:{self.port}/{self.name}"
             f"?ssl={self.ssl_mode}"
         )
+    
+    @property
+    def dsn(self) -> str:
+        return self._dsn
+    
+    # Fields reported by Settings.to_dict (for logging)
+    _LOG_FIELDS = ("host", "port", "name", "user", "ssl_mode", "pool_size", "use_pgbouncer")
 
 
-@dataclass
+@dataclass(slots=True)
 class RedisConfig:
     """Redis configuration"""
     host: str = "localhost"
@@ -41,14 +53,23 @@ class RedisConfig:
     ssl: bool = False
     max_connections: int = 50
     
-    @property
-    def url(self) -> str:
+    # Formatted once in __post_init__
+    _url: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
         protocol = "rediss" if self.ssl else "redis"
         auth = f":{self.password}@" if self.password else ""
-        return f"{protocol}://{auth}{self.host}:{self.port}/{self.database}"
+        self._url = f"{protocol}://{auth}{self.host}:{self.port}/{self.database}"
+    
+    @property
+    def url(self) -> str:
+        return self._url
+    
+    # Fields reported by Settings.to_dict (for logging)
+    _LOG_FIELDS = ("host", "port", "database", "ssl", "max_connections")
 
 
-@dataclass
+@dataclass(slots=True)
 class TelegramConfig:
     """Telegram bot configuration"""
     bot_token: str = ""
@@ -67,9 +88,16 @@ class TelegramConfig:
     # Notification channels
     log_channel: Optional[str] = None
     broadcast_channel: Optional[str] = None
+    
+    @property
+    def admin_ids_count(self) -> int:
+        return len(self.admin_ids)
+    
+    # Fields reported by Settings.to_dict (for logging)
+    _LOG_FIELDS = ("admin_ids_count", "webhook_url", "polling_timeout")
 
 
-@dataclass
+@dataclass(slots=True)
 class PaymentConfig:
     """Payment gateway configuration"""
     # ToyyibPay
@@ -103,9 +131,19 @@ class PaymentConfig:
     @property
     def full_price_sen(self) -> int:
         return int(self.full_price * 100)
+    
+    # Fields reported by Settings.to_dict (for logging)
+    _LOG_FIELDS = (
+        "trial_price",
+        "full_price",
+        "trial_days",
+        "full_days",
+        "trial_device_limit",
+        "full_device_limit",
+    )
 
 
-@dataclass
+@dataclass(slots=True)
 class VPNConfig:
     """VPN service configuration"""
     # Xray configuration
@@ -138,9 +176,12 @@ class VPNConfig:
     ssh_port: int = 22
     ssh_key_path: str = "~/.ssh/id_rsa"
     ssh_timeout: int = 30
+    
+    # Fields reported by Settings.to_dict (for logging)
+    _LOG_FIELDS = ("auto_scaling_enabled", "default_capacity", "health_check_interval")
 
 
-@dataclass
+@dataclass(slots=True)
 class NotificationConfig:
     """Notification service configuration"""
     # Email (SMTP)
@@ -170,9 +211,12 @@ class NotificationConfig:
     # Rate limiting
     max_notifications_per_hour: int = 10
     notification_cooldown: int = 300  # 5 minutes
+    
+    # Fields reported by Settings.to_dict (for logging)
+    _LOG_FIELDS = ("smtp_enabled", "sms_enabled", "push_enabled", "reminder_intervals")
 
 
-@dataclass
+@dataclass(slots=True)
 class AnalyticsConfig:
     """Analytics and monitoring configuration"""
     # Metrics collection
@@ -191,9 +235,12 @@ class AnalyticsConfig:
     grafana_enabled: bool = False
     prometheus_enabled: bool = False
     datadog_enabled: bool = False
+    
+    # Fields reported by Settings.to_dict (for logging)
+    _LOG_FIELDS = ("metrics_enabled", "realtime_enabled", "dashboard_port")
 
 
-@dataclass
+@dataclass(slots=True)
 class SecurityConfig:
     """Security configuration"""
     # JWT
@@ -217,9 +264,12 @@ class SecurityConfig:
     # Audit logging
     audit_enabled: bool = True
     audit_retention_days: int = 365
+    
+    # Fields reported by Settings.to_dict (for logging)
+    _LOG_FIELDS = ("rate_limit_enabled", "audit_enabled", "session_timeout")
 
 
-@dataclass
+@dataclass(slots=True)
 class ServerConfig:
     """Server configuration"""
     host: str = "0.0.0.0"
@@ -248,14 +298,199 @@ class ServerConfig:
     log_file: Optional[str] = None
     log_max_size: str = "100MB"
     log_backup_count: int = 5
+    
+    # Fields reported by Settings.to_dict (for logging)
+    _LOG_FIELDS = ("host", "port", "workers", "ssl_enabled", "debug", "log_level")
+
+
+def _env_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+def _env_list(parse=str):
+    """Parser for comma-separated values; an empty variable keeps the field default"""
+    def parse_list(value: str) -> Optional[List[Any]]:
+        if not value:
+            return None
+        return [parse(item.strip()) for item in value.split(",")]
+    return parse_list
+
+
+def _read_env(env: Dict[str, str], spec) -> Dict[str, Any]:
+    """Build config kwargs from an environment spec"""
+    kwargs = {}
+    for key, attr, parse in spec:
+        if key in env:
+            value = parse(env[key])
+            if value is not None:
+                kwargs[attr] = value
+    return kwargs
+
+
+# Environment specs: (variable, field, parser). Variables that are not set
+# leave the dataclass default in place.
+_DATABASE_ENV = (
+    ("DB_HOST", "host", str),
+    ("DB_PORT", "port", int),
+    ("DB_NAME", "name", str),
+    ("DB_USER", "user", str),
+    ("DB_PASSWORD", "password", str),
+    ("DB_SSL_MODE", "ssl_mode", str),
+    ("DB_POOL_SIZE", "pool_size", int),
+    ("DB_MAX_OVERFLOW", "max_overflow", int),
+    ("DB_USE_PGBOUNCER", "use_pgbouncer", _env_bool),
+    ("DB_BACKUP_COMPRESSION", "backup_compression", str),
+)
+
+_REDIS_ENV = (
+    ("REDIS_HOST", "host", str),
+    ("REDIS_PORT", "port", int),
+    ("REDIS_DB", "database", int),
+    ("REDIS_PASSWORD", "password", str),
+    ("REDIS_SSL", "ssl", _env_bool),
+    ("REDIS_MAX_CONNECTIONS", "max_connections", int),
+)
+
+_TELEGRAM_ENV = (
+    ("BOT_TOKEN", "bot_token", str),
+    ("ADMIN_IDS", "admin_ids", _env_list(int)),
+    ("WEBHOOK_URL", "webhook_url", str),
+    ("WEBHOOK_PORT", "webhook_port", int),
+    ("POLLING_TIMEOUT", "polling_timeout", int),
+    ("LOG_CHANNEL", "log_channel", str),
+    ("BROADCAST_CHANNEL", "broadcast_channel", str),
+)
+
+_PAYMENT_ENV = (
+    ("TOYYIBPAY_USER_SECRET_KEY", "toyyibpay_secret_key", str),
+    ("TOYYIBPAY_CATEGORY_CODE", "toyyibpay_category_code", str),
+    ("TOYYIBPAY_BASE_URL", "toyyibpay_base_url", str),
+    ("STRIPE_SECRET_KEY", "stripe_secret_key", str),
+    ("STRIPE_WEBHOOK_SECRET", "stripe_webhook_secret", str),
+    ("CRYPTO_ENABLED", "crypto_enabled", _env_bool),
+    ("PRICE_TRIAL_RM", "trial_price", float),
+    ("TRIAL_DAYS", "trial_days", int),
+    ("PRICE_FULL_RM", "full_price", float),
+    ("FULL_DAYS", "full_days", int),
+    ("RENEW_DISCOUNT", "renew_discount", float),
+    ("TRIAL_DEVICE_LIMIT", "trial_device_limit", int),
+    ("FULL_DEVICE_LIMIT", "full_device_limit", int),
+)
+
+_VPN_ENV = (
+    ("XRAY_CONFIG_PATH", "xray_config_path", str),
+    ("XRAY_RESTART_COMMAND", "xray_restart_command", str),
+    ("VLESS_TLS_PORT", "vless_tls_port", int),
+    ("VLESS_NTLS_PORT", "vless_ntls_port", int),
+    ("VLESS_WS_PATH", "vless_ws_path", str),
+    ("TLS_SNI", "tls_sni", str),
+    ("ALLOW_INSECURE", "allow_insecure", _env_bool),
+    ("SERVER_CAPACITY_DEFAULT", "default_capacity", int),
+    ("AUTO_SCALING_ENABLED", "auto_scaling_enabled", _env_bool),
+    ("HEALTH_CHECK_INTERVAL", "health_check_interval", int),
+    ("SSH_USER", "ssh_user", str),
+    ("SSH_PORT", "ssh_port", int),
+    ("SSH_KEY_PATH", "ssh_key_path", str),
+)
+
+_NOTIFICATION_ENV = (
+    ("SMTP_ENABLED", "smtp_enabled", _env_bool),
+    ("SMTP_HOST", "smtp_host", str),
+    ("SMTP_PORT", "smtp_port", int),
+    ("SMTP_USER", "smtp_user", str),
+    ("SMTP_PASSWORD", "smtp_password", str),
+    ("SMS_ENABLED", "sms_enabled", _env_bool),
+    ("TWILIO_ACCOUNT_SID", "twilio_account_sid", str),
+    ("TWILIO_AUTH_TOKEN", "twilio_auth_token", str),
+    ("TWILIO_FROM_NUMBER", "twilio_from_number", str),
+    ("PUSH_ENABLED", "push_enabled", _env_bool),
+    ("FIREBASE_PROJECT_ID", "firebase_project_id", str),
+    ("REMINDER_INTERVALS", "reminder_intervals", _env_list(int)),
+    ("MAX_NOTIFICATIONS_PER_HOUR", "max_notifications_per_hour", int),
+    ("NOTIFICATION_COOLDOWN", "notification_cooldown", int),
+)
+
+_ANALYTICS_ENV = (
+    ("METRICS_ENABLED", "metrics_enabled", _env_bool),
+    ("METRICS_RETENTION_DAYS", "metrics_retention_days", int),
+    ("REALTIME_ENABLED", "realtime_enabled", _env_bool),
+    ("WEBSOCKET_PORT", "websocket_port", int),
+    ("DASHBOARD_PORT", "dashboard_port", int),
+    ("DASHBOARD_SECRET", "dashboard_secret", str),
+    ("GRAFANA_ENABLED", "grafana_enabled", _env_bool),
+    ("PROMETHEUS_ENABLED", "prometheus_enabled", _env_bool),
+)
+
+_SECURITY_ENV = (
+    ("JWT_SECRET", "jwt_secret", str),
+    ("JWT_ALGORITHM", "jwt_algorithm", str),
+    ("JWT_EXPIRATION", "jwt_expiration", int),
+    ("RATE_LIMIT_ENABLED", "rate_limit_enabled", _env_bool),
+    ("RATE_LIMIT_REQUESTS", "rate_limit_requests", int),
+    ("RATE_LIMIT_WINDOW", "rate_limit_window", int),
+    ("PASSWORD_MIN_LENGTH", "password_min_length", int),
+    ("PASSWORD_REQUIRE_COMPLEXITY", "password_require_complexity", _env_bool),
+    ("SESSION_TIMEOUT", "session_timeout", int),
+    ("SESSION_MAX_CONCURRENT", "session_max_concurrent", int),
+    ("AUDIT_ENABLED", "audit_enabled", _env_bool),
+    ("AUDIT_RETENTION_DAYS", "audit_retention_days", int),
+)
+
+_SERVER_ENV = (
+    ("SERVER_HOST", "host", str),
+    ("SERVER_PORT", "port", int),
+    ("SERVER_WORKERS", "workers", int),
+    ("SSL_ENABLED", "ssl_enabled", _env_bool),
+    ("SSL_CERT_PATH", "ssl_cert_path", str),
+    ("SSL_KEY_PATH", "ssl_key_path", str),
+    ("CORS_ENABLED", "cors_enabled", _env_bool),
+    ("CORS_ORIGINS", "cors_origins", _env_list()),
+    ("STATIC_PATH", "static_path", str),
+    ("TEMPLATES_PATH", "templates_path", str),
+    ("DEBUG", "debug", _env_bool),
+    ("RELOAD", "reload", _env_bool),
+    ("LOG_LEVEL", "log_level", str),
+    ("LOG_FILE", "log_file", str),
+    ("LOG_MAX_SIZE", "log_max_size", str),
+    ("LOG_BACKUP_COUNT", "log_backup_count", int),
+)
+
+# Required settings checked by Settings.validate: (getter, error message)
+_REQUIRED = tuple(
+    (attrgetter(path), message)
+    for path, message in (
+        ("telegram.bot_token", "BOT_TOKEN is required"),
+        ("payment.toyyibpay_secret_key", "TOYYIBPAY_USER_SECRET_KEY is required"),
+        ("payment.toyyibpay_category_code", "TOYYIBPAY_CATEGORY_CODE is required"),
+        ("security.jwt_secret", "JWT_SECRET is required"),
+        ("database.password", "DB_PASSWORD is required"),
+    )
+)
 
 
 class Settings:
     """Main settings class"""
     
+    _SECTIONS = (
+        "database",
+        "redis",
+        "telegram",
+        "payment",
+        "vpn",
+        "notification",
+        "analytics",
+        "security",
+        "server",
+    )
+    
     def __init__(self, env_file: str = "config/.env"):
-        # Load environment variables
-        load_dotenv(env_file)
+        from dotenv import dotenv_values
+        
+        # Load environment variables (process environment overrides the file)
+        self._env = {
+            key: value for key, value in dotenv_values(env_file).items() if value is not None
+        }
+        self._env.update(os.environ)
         
         # Initialize configurations
         self.database = self._init_database()
@@ -271,234 +506,63 @@ class Settings:
         # Validate configuration
         self.validate()
         
+        self._dict: Optional[Dict[str, Any]] = None
+        self._json: Optional[str] = None
+        
     def _init_database(self) -> DatabaseConfig:
-        return DatabaseConfig(
-            host=os.getenv("DB_HOST", "localhost"),
-            port=int(os.getenv("DB_PORT", "5432")),
-            name=os.getenv("DB_NAME", "connectifyvpn"),
-            user=os.getenv("DB_USER", "postgres"),
-            password=os.getenv("DB_PASSWORD", ""),
-            ssl_mode=os.getenv("DB_SSL_MODE", "prefer"),
-            pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
-            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "30"))
-        )
+        return DatabaseConfig(**_read_env(self._env, _DATABASE_ENV))
     
     def _init_redis(self) -> RedisConfig:
-        return RedisConfig(
-            host=os.getenv("REDIS_HOST", "localhost"),
-            port=int(os.getenv("REDIS_PORT", "6379")),
-            database=int(os.getenv("REDIS_DB", "0")),
-            password=os.getenv("REDIS_PASSWORD"),
-            ssl=os.getenv("REDIS_SSL", "false").lower() == "true",
-            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
-        )
+        return RedisConfig(**_read_env(self._env, _REDIS_ENV))
     
     def _init_telegram(self) -> TelegramConfig:
-        admin_ids = []
-        if os.getenv("ADMIN_IDS"):
-            admin_ids = [int(x.strip()) for x in os.getenv("ADMIN_IDS").split(",")]
-            
-        return TelegramConfig(
-            bot_token=os.getenv("BOT_TOKEN", ""),
-            admin_ids=admin_ids,
-            webhook_url=os.getenv("WEBHOOK_URL"),
-            webhook_port=int(os.getenv("WEBHOOK_PORT", "8443")),
-            polling_timeout=int(os.getenv("POLLING_TIMEOUT", "30")),
-            log_channel=os.getenv("LOG_CHANNEL"),
-            broadcast_channel=os.getenv("BROADCAST_CHANNEL")
-        )
+        return TelegramConfig(**_read_env(self._env, _TELEGRAM_ENV))
     
     def _init_payment(self) -> PaymentConfig:
-        return PaymentConfig(
-            toyyibpay_secret_key=os.getenv("TOYYIBPAY_USER_SECRET_KEY", ""),
-            toyyibpay_category_code=os.getenv("TOYYIBPAY_CATEGORY_CODE", ""),
-            toyyibpay_base_url=os.getenv("TOYYIBPAY_BASE_URL", "https://toyyibpay.com"),
-            stripe_secret_key=os.getenv("STRIPE_SECRET_KEY"),
-            stripe_webhook_secret=os.getenv("STRIPE_WEBHOOK_SECRET"),
-            crypto_enabled=os.getenv("CRYPTO_ENABLED", "false").lower() == "true",
-            trial_price=float(os.getenv("PRICE_TRIAL_RM", "1.0")),
-            trial_days=int(os.getenv("TRIAL_DAYS", "3")),
-            full_price=float(os.getenv("PRICE_FULL_RM", "35.0")),
-            full_days=int(os.getenv("FULL_DAYS", "365")),
-            renew_discount=float(os.getenv("RENEW_DISCOUNT", "0.1")),
-            trial_device_limit=int(os.getenv("TRIAL_DEVICE_LIMIT", "1")),
-            full_device_limit=int(os.getenv("FULL_DEVICE_LIMIT", "5"))
-        )
+        return PaymentConfig(**_read_env(self._env, _PAYMENT_ENV))
     
     def _init_vpn(self) -> VPNConfig:
-        return VPNConfig(
-            xray_config_path=os.getenv("XRAY_CONFIG_PATH", "/etc/xray/config.json"),
-            xray_restart_command=os.getenv("XRAY_RESTART_COMMAND", "systemctl restart xray"),
-            vless_tls_port=int(os.getenv("VLESS_TLS_PORT", "443")),
-            vless_ntls_port=int(os.getenv("VLESS_NTLS_PORT", "80")),
-            vless_ws_path=os.getenv("VLESS_WS_PATH", "/vless"),
-            tls_sni=os.getenv("TLS_SNI"),
-            allow_insecure=os.getenv("ALLOW_INSECURE", "false").lower() == "true",
-            default_capacity=int(os.getenv("SERVER_CAPACITY_DEFAULT", "20")),
-            auto_scaling_enabled=os.getenv("AUTO_SCALING_ENABLED", "true").lower() == "true",
-            health_check_interval=int(os.getenv("HEALTH_CHECK_INTERVAL", "60")),
-            ssh_user=os.getenv("SSH_USER", "root"),
-            ssh_port=int(os.getenv("SSH_PORT", "22")),
-            ssh_key_path=os.getenv("SSH_KEY_PATH", "~/.ssh/id_rsa")
-        )
+        return VPNConfig(**_read_env(self._env, _VPN_ENV))
     
     def _init_notification(self) -> NotificationConfig:
-        reminder_intervals = [7, 3, 1]
-        if os.getenv("REMINDER_INTERVALS"):
-            reminder_intervals = [
-                int(x.strip()) for x in os.getenv("REMINDER_INTERVALS").split(",")
-            ]
-            
-        return NotificationConfig(
-            smtp_enabled=os.getenv("SMTP_ENABLED", "false").lower() == "true",
-            smtp_host=os.getenv("SMTP_HOST", "smtp.gmail.com"),
-            smtp_port=int(os.getenv("SMTP_PORT", "587")),
-            smtp_user=os.getenv("SMTP_USER", ""),
-            smtp_password=os.getenv("SMTP_PASSWORD", ""),
-            sms_enabled=os.getenv("SMS_ENABLED", "false").lower() == "true",
-            twilio_account_sid=os.getenv("TWILIO_ACCOUNT_SID", ""),
-            twilio_auth_token=os.getenv("TWILIO_AUTH_TOKEN", ""),
-            twilio_from_number=os.getenv("TWILIO_FROM_NUMBER", ""),
-            push_enabled=os.getenv("PUSH_ENABLED", "false").lower() == "true",
-            firebase_project_id=os.getenv("FIREBASE_PROJECT_ID", ""),
-            reminder_intervals=reminder_intervals,
-            max_notifications_per_hour=int(os.getenv("MAX_NOTIFICATIONS_PER_HOUR", "10")),
-            notification_cooldown=int(os.getenv("NOTIFICATION_COOLDOWN", "300"))
-        )
+        return NotificationConfig(**_read_env(self._env, _NOTIFICATION_ENV))
     
     def _init_analytics(self) -> AnalyticsConfig:
-        return AnalyticsConfig(
-            metrics_enabled=os.getenv("METRICS_ENABLED", "true").lower() == "true",
-            metrics_retention_days=int(os.getenv("METRICS_RETENTION_DAYS", "90")),
-            realtime_enabled=os.getenv("REALTIME_ENABLED", "true").lower() == "true",
-            websocket_port=int(os.getenv("WEBSOCKET_PORT", "8080")),
-            dashboard_port=int(os.getenv("DASHBOARD_PORT", "3000")),
-            dashboard_secret=os.getenv("DASHBOARD_SECRET", ""),
-            grafana_enabled=os.getenv("GRAFANA_ENABLED", "false").lower() == "true",
-            prometheus_enabled=os.getenv("PROMETHEUS_ENABLED", "false").lower() == "true"
-        )
+        return AnalyticsConfig(**_read_env(self._env, _ANALYTICS_ENV))
     
     def _init_security(self) -> SecurityConfig:
-        return SecurityConfig(
-            jwt_secret=os.getenv("JWT_SECRET", ""),
-            jwt_algorithm=os.getenv("JWT_ALGORITHM", "HS256"),
-            jwt_expiration=int(os.getenv("JWT_EXPIRATION", "3600")),
-            rate_limit_enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
-            rate_limit_requests=int(os.getenv("RATE_LIMIT_REQUESTS", "100")),
-            rate_limit_window=int(os.getenv("RATE_LIMIT_WINDOW", "60")),
-            password_min_length=int(os.getenv("PASSWORD_MIN_LENGTH", "8")),
-            password_require_complexity=os.getenv("PASSWORD_REQUIRE_COMPLEXITY", "true").lower() == "true",
-            session_timeout=int(os.getenv("SESSION_TIMEOUT", "1800")),
-            session_max_concurrent=int(os.getenv("SESSION_MAX_CONCURRENT", "3")),
-            audit_enabled=os.getenv("AUDIT_ENABLED", "true").lower() == "true",
-            audit_retention_days=int(os.getenv("AUDIT_RETENTION_DAYS", "365"))
-        )
+        return SecurityConfig(**_read_env(self._env, _SECURITY_ENV))
     
     def _init_server(self) -> ServerConfig:
-        cors_origins = ["*"]
-        if os.getenv("CORS_ORIGINS"):
-            cors_origins = [x.strip() for x in os.getenv("CORS_ORIGINS").split(",")]
-            
-        return ServerConfig(
-            host=os.getenv("SERVER_HOST", "0.0.0.0"),
-            port=int(os.getenv("SERVER_PORT", "8000")),
-            workers=int(os.getenv("SERVER_WORKERS", "4")),
-            ssl_enabled=os.getenv("SSL_ENABLED", "false").lower() == "true",
-            ssl_cert_path=os.getenv("SSL_CERT_PATH"),
-            ssl_key_path=os.getenv("SSL_KEY_PATH"),
-            cors_enabled=os.getenv("CORS_ENABLED", "true").lower() == "true",
-            cors_origins=cors_origins,
-            static_path=os.getenv("STATIC_PATH", "web/static"),
-            templates_path=os.getenv("TEMPLATES_PATH", "web/templates"),
-            debug=os.getenv("DEBUG", "false").lower() == "true",
-            reload=os.getenv("RELOAD", "false").lower() == "true",
-            log_level=os.getenv("LOG_LEVEL", "INFO"),
-            log_file=os.getenv("LOG_FILE"),
-            log_max_size=os.getenv("LOG_MAX_SIZE", "100MB"),
-            log_backup_count=int(os.getenv("LOG_BACKUP_COUNT", "5"))
-        )
+        return ServerConfig(**_read_env(self._env, _SERVER_ENV))
     
     def validate(self):
         """Validate required configuration"""
-        errors = []
-        
-        # Check required fields
-        if not self.telegram.bot_token:
-            errors.append("BOT_TOKEN is required")
-            
-        if not self.payment.toyyibpay_secret_key:
-            errors.append("TOYYIBPAY_USER_SECRET_KEY is required")
-            
-        if not self.payment.toyyibpay_category_code:
-            errors.append("TOYYIBPAY_CATEGORY_CODE is required")
-            
-        if not self.security.jwt_secret:
-            errors.append("JWT_SECRET is required")
-            
-        if not self.database.password:
-            errors.append("DB_PASSWORD is required")
-            
+        errors = [message for getter, message in _REQUIRED if not getter(self)]
         if errors:
             raise ValueError(f"Configuration errors: {', '.join(errors)}")
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert settings to dictionary (for logging)"""
-        return {
-            "database": {
-                "host": self.database.host,
-                "port": self.database.port,
-                "name": self.database.name,
-                "user": self.database.user,
-                "ssl_mode": self.database.ssl_mode,
-                "pool_size": self.database.pool_size,
-            },
-            "redis": {
-                "host": self.redis.host,
-                "port": self.redis.port,
-                "database": self.redis.database,
-                "ssl": self.redis.ssl,
-                "max_connections": self.redis.max_connections,
-            },
-            "telegram": {
-                "admin_ids_count": len(self.telegram.admin_ids),
-                "webhook_url": self.telegram.webhook_url,
-                "polling_timeout": self.telegram.polling_timeout,
-            },
-            "payment": {
-                "trial_price": self.payment.trial_price,
-                "full_price": self.payment.full_price,
-                "trial_days": self.payment.trial_days,
-                "full_days": self.payment.full_days,
-                "trial_device_limit": self.payment.trial_device_limit,
-                "full_device_limit": self.payment.full_device_limit,
-            },
-            "vpn": {
-                "auto_scaling_enabled": self.vpn.auto_scaling_enabled,
-                "default_capacity": self.vpn.default_capacity,
-                "health_check_interval": self.vpn.health_check_interval,
-            },
-            "notification": {
-                "smtp_enabled": self.notification.smtp_enabled,
-                "sms_enabled": self.notification.sms_enabled,
-                "push_enabled": self.notification.push_enabled,
-                "reminder_intervals": self.notification.reminder_intervals,
-            },
-            "analytics": {
-                "metrics_enabled": self.analytics.metrics_enabled,
-                "realtime_enabled": self.analytics.realtime_enabled,
-                "dashboard_port": self.analytics.dashboard_port,
-            },
-            "security": {
-                "rate_limit_enabled": self.security.rate_limit_enabled,
-                "audit_enabled": self.security.audit_enabled,
-                "session_timeout": self.security.session_timeout,
-            },
-            "server": {
-                "host": self.server.host,
-                "port": self.server.port,
-                "workers": self.server.workers,
-                "ssl_enabled": self.server.ssl_enabled,
-                "debug": self.server.debug,
-                "log_level": self.server.log_level,
-            },
-        }
+        # Settings do not change after validate(), so build this once
+        if self._dict is None:
+            sections = {name: getattr(self, name) for name in self._SECTIONS}
+            self._dict = {
+                name: {attr: getattr(config, attr) for attr in config._LOG_FIELDS}
+                for name, config in sections.items()
+            }
+        return self._dict
+    
+    def to_json(self) -> str:
+        """Serialize to_dict() to JSON (for structured logs), once"""
+        if self._json is None:
+            import orjson
+            
+            self._json = orjson.dumps(self.to_dict()).decode()
+        return self._json
+
+
+@lru_cache(maxsize=1)
+def get_settings(env_file: str = "config/.env") -> Settings:
+    """Get the process-wide settings instance (parsed on first call)"""
+    return Settings(env_file)
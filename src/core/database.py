@@ -2,19 +2,57 @@
 Database management for ConnectifyVPN Premium Suite
 """
 
+from __future__ import annotations
+
 import os
+import time
+import uuid
 import asyncio
 import datetime
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, AsyncGenerator, Any, Dict, List, Union
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    AsyncGenerator,
+    AsyncIterator,
+    Any,
+    Dict,
+    List,
+    Mapping,
+    Tuple,
+    Union,
+)
 
-from redis.asyncio import Redis
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from .config import Settings
 from .models import Base
 
+if TYPE_CHECKING:
+    import asyncpg
+    from redis.asyncio import Redis
+    from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker
+
+# Statements built once so SQLAlchemy's compiled cache is hit on every call
+_SELECT_1 = text("SELECT 1")
+
+# Fixed read-only queries sent straight through the asyncpg pool
+_DB_SIZE = "SELECT pg_database_size(current_database())"
+_CONN_COUNT = "SELECT count(*) FROM pg_stat_activity"
+
+
+@lru_cache(maxsize=256)
+def _text(query: str) -> Any:
+    """text() clause for string queries passed to execute_raw_query (bounded cache)"""
+    return text(query)
+
+
+def _as_statement(query: Union[str, Any]) -> Any:
+    """Wrap string SQL in a cached text() clause; pass other statements through"""
+    return _text(query) if isinstance(query, str) else query
+
 
 class DatabaseManager:
     """
@@ -25,23 +63,56 @@ class DatabaseManager:
         self.settings = settings
         self.engine = None
         self.session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+        # Plain asyncpg pool for fixed read-only queries (health, stats);
+        # ORM work goes through the SQLAlchemy engine
+        self.pg_pool: Optional[asyncpg.Pool] = None
         self.redis_client: Optional[Redis] = None
+        self._info_cache: Optional[Tuple[float, Dict[str, Any]]] = None
 
     async def initialize(self):
-        """Initialize database connections"""
-        await self._init_postgres()
-        await self._init_redis()
+        """Initialize database connections (PostgreSQL and Redis concurrently)"""
+        await asyncio.gather(self._init_postgres(), self._init_redis())
 
     async def _init_postgres(self):
         """Initialize PostgreSQL connection pool"""
+        import asyncpg
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+        from sqlalchemy.pool import NullPool
+
+        database = self.settings.database
+
+        if database.use_pgbouncer:
+            # PgBouncer (transaction mode) does the pooling, and a server
+            # connection may change between transactions, so prepared
+            # statements must not be cached or reused by name
+            pool_args: Dict[str, Any] = {"poolclass": NullPool}
+            connect_args: Dict[str, Any] = {
+                "prepared_statement_cache_size": 0,
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        else:
+            pool_args = {
+                "pool_size": database.pool_size,
+                "max_overflow": database.max_overflow,
+                # No pre-ping round-trip per checkout; recycle stays below
+                # typical server/proxy idle timeouts instead
+                "pool_recycle": 300,
+            }
+            connect_args = {
+                "prepared_statement_cache_size": 1024,
+                "statement_cache_size": 1024,
+                # PgBouncer rejects unknown startup parameters, so this is
+                # only sent on direct connections
+                "server_settings": {"jit": "off"},
+            }
+
         self.engine = create_async_engine(
-            self.settings.database.dsn,
+            database.dsn,
             echo=self.settings.server.debug,
-            pool_size=self.settings.database.pool_size,
-            max_overflow=self.settings.database.max_overflow,
-            pool_pre_ping=True,
-            pool_recycle=300,
+            connect_args=connect_args,
             future=True,
+            **pool_args,
         )
 
         self.session_factory = async_sessionmaker(
@@ -53,10 +124,27 @@ class DatabaseManager:
 
         # Test connection (SQLAlchemy 2.0 needs text())
         async with self.engine.begin() as conn:
-            await conn.execute(text("SELECT 1"))
+            await conn.execute(_SELECT_1)
+
+        self.pg_pool = await asyncpg.create_pool(
+            host=database.host,
+            port=database.port,
+            user=database.user,
+            password=database.password,
+            database=database.name,
+            ssl=database.ssl_mode,
+            # Only health/stats queries use this pool: keep it small on top of
+            # the engine's connections, and hold nothing idle behind PgBouncer
+            min_size=0 if database.use_pgbouncer else 1,
+            max_size=2,
+            statement_cache_size=connect_args["statement_cache_size"],
+            server_settings=connect_args.get("server_settings"),
+        )
 
     async def _init_redis(self):
         """Initialize Redis connection"""
+        from redis.asyncio import Redis
+
         self.redis_client = Redis.from_url(
             self.settings.redis.url,
             max_connections=self.settings.redis.max_connections,
@@ -78,8 +166,9 @@ class DatabaseManager:
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
 
-    async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
-        """Get database session"""
+    @asynccontextmanager
+    async def session_scope(self) -> AsyncIterator[AsyncSession]:
+        """Transactional session: commits on success, rolls back on error"""
         if not self.session_factory:
             raise RuntimeError("Session factory not initialized")
         async with self.session_factory() as session:
@@ -90,54 +179,74 @@ class DatabaseManager:
                 await session.rollback()
                 raise
 
+    # `async with db.session() as session:`
+    session = session_scope
+
+    @asynccontextmanager
+    async def read_conn(self) -> AsyncIterator[AsyncConnection]:
+        """Core connection for read-only queries (no ORM session/identity map)"""
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        async with self.engine.connect() as conn:
+            yield conn
+
+    async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
+        """Get database session (generator form, e.g. for FastAPI Depends)"""
+        async with self.session_scope() as session:
+            yield session
+
     async def get_redis(self) -> Redis:
         """Get Redis client"""
         if not self.redis_client:
             raise RuntimeError("Redis not initialized")
         return self.redis_client
 
-    async def health_check(self) -> Dict[str, bool]:
-        """Check database health"""
-        health = {"postgres": False, "redis": False}
-
-        # PostgreSQL
+    async def ping_postgres(self, timeout: float = 2.0) -> bool:
+        """Check PostgreSQL connectivity"""
         try:
-            if self.engine:
-                async with self.engine.begin() as conn:
-                    await conn.execute(text("SELECT 1"))
-                health["postgres"] = True
+            if self.pg_pool:
+                async with asyncio.timeout(timeout):
+                    await self.pg_pool.fetchval("SELECT 1")
+                return True
         except Exception:
             pass
+        return False
 
-        # Redis
+    async def ping_redis(self, timeout: float = 2.0) -> bool:
+        """Check Redis connectivity"""
         try:
             if self.redis_client:
-                await self.redis_client.ping()
-                health["redis"] = True
+                async with asyncio.timeout(timeout):
+                    await self.redis_client.ping()
+                return True
         except Exception:
             pass
+        return False
 
-        return health
+    async def health_check(self, timeout: float = 2.0) -> Dict[str, bool]:
+        """Check database health (both probes run concurrently)"""
+        async with asyncio.TaskGroup() as tg:
+            postgres = tg.create_task(self.ping_postgres(timeout))
+            redis = tg.create_task(self.ping_redis(timeout))
+        return {"postgres": postgres.result(), "redis": redis.result()}
 
     async def get_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
-        if not self.engine:
+        if not self.pg_pool:
             raise RuntimeError("Database engine not initialized")
 
         stats: Dict[str, Any] = {}
 
-        async with self.engine.begin() as conn:
+        async with self.pg_pool.acquire() as conn:
             # DB size
-            result = await conn.execute(text("SELECT pg_database_size(current_database())"))
-            stats["postgres_size_bytes"] = result.scalar()
+            stats["postgres_size_bytes"] = await conn.fetchval(_DB_SIZE)
 
             # Connections count
-            result = await conn.execute(text("SELECT count(*) FROM pg_stat_activity"))
-            stats["postgres_connections"] = result.scalar()
+            stats["postgres_connections"] = await conn.fetchval(_CONN_COUNT)
 
         if self.redis_client:
             try:
-                redis_info = await self.redis_client.info()
+                redis_info = await self._cached_redis_info()
                 stats["redis_memory"] = redis_info.get("used_memory_human", "N/A")
                 stats["redis_connected_clients"] = redis_info.get("connected_clients", 0)
                 stats["redis_total_commands_processed"] = redis_info.get(
@@ -148,8 +257,31 @@ class DatabaseManager:
 
         return stats
 
+    async def _cached_redis_info(self, ttl: float = 2.0) -> Dict[str, Any]:
+        """Redis INFO (memory, clients and stats sections only), cached for `ttl` seconds"""
+        now = time.monotonic()
+        if self._info_cache and now - self._info_cache[0] < ttl:
+            return self._info_cache[1]
+
+        # One round-trip for the three sections get_stats reads
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.info("memory")
+            pipe.info("clients")
+            pipe.info("stats")
+            sections = await pipe.execute()
+
+        info: Dict[str, Any] = {}
+        for section in sections:
+            info.update(section)
+        self._info_cache = (now, info)
+        return info
+
     async def close(self):
         """Close all database connections"""
+        if self.pg_pool:
+            await self.pg_pool.close()
+            self.pg_pool = None
+
         if self.engine:
             await self.engine.dispose()
             self.engine = None
@@ -162,28 +294,54 @@ class DatabaseManager:
         self,
         query: Union[str, Any],
         params: Optional[Dict[str, Any]] = None,
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Mapping[str, Any]]:
         """
         Execute raw SQL query safely.
         - Accepts string SQL or a SQLAlchemy text()/select() object.
+        - Rows are read-only mappings; copy with dict() if needed.
         """
         if not self.engine:
             raise RuntimeError("Database engine not initialized")
 
-        stmt = text(query) if isinstance(query, str) else query
-
         async with self.engine.connect() as conn:
-            result = await conn.execute(stmt, params or {})
-            # result.mappings() returns dict-like rows
-            return [dict(row) for row in result.mappings().all()]
+            result = await conn.execute(_as_statement(query), params or {})
+            return result.mappings().all()
 
-    async def backup_database(self, backup_path: str) -> str:
-        """Create database backup using pg_dump (custom format)"""
+    async def stream_raw_query(
+        self,
+        query: Union[str, Any],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        """
+        Execute raw SQL query and yield rows as they arrive (server-side cursor),
+        without loading the whole result set into memory.
+        """
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+
+        async with self.engine.connect() as conn:
+            result = await conn.stream(_as_statement(query), params or {})
+            async for row in result.mappings():
+                yield row
+
+    def pg_client_env(self) -> Dict[str, str]:
+        """Minimal environment for pg_dump/pg_restore (no unrelated process secrets)"""
+        return {
+            "PGPASSWORD": self.settings.database.password,
+            "PATH": os.environ.get("PATH", ""),
+            "HOME": os.environ.get("HOME", ""),
+        }
+
+    def backup_file_path(self, backup_path: str) -> Path:
+        """Timestamped dump file inside the backup_path directory (created if missing)"""
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"connectifyvpn_backup_{timestamp}.dump"
         filepath = Path(backup_path) / filename
         filepath.parent.mkdir(parents=True, exist_ok=True)
+        return filepath
 
+    def pg_dump_command(self, filepath: Optional[Path] = None) -> List[str]:
+        """pg_dump argv (custom format); the archive goes to stdout unless filepath is given"""
         cmd = [
             "pg_dump",
             "-h",
@@ -194,22 +352,29 @@ class DatabaseManager:
             self.settings.database.user,
             "-d",
             self.settings.database.name,
-            "-f",
-            str(filepath),
             "--format=custom",
-            "--verbose",
         ]
+        if filepath is not None:
+            cmd += ["-f", str(filepath)]
+        if self.settings.database.backup_compression:
+            cmd.append(f"--compress={self.settings.database.backup_compression}")
+        return cmd
 
-        env = os.environ.copy()
-        env["PGPASSWORD"] = self.settings.database.password
+    async def backup_database(self, backup_path: str) -> str:
+        """Create database backup using pg_dump (custom format)"""
+        filepath = self.backup_file_path(backup_path)
+        cmd = self.pg_dump_command(filepath)
 
+        env = self.pg_client_env()
+
+        # pg_dump writes the archive itself (-f); only stderr is kept for errors
         process = await asyncio.create_subprocess_exec(
             *cmd,
             env=env,
-            stdout=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
             stderr=asyncio.subprocess.PIPE,
         )
-        stdout, stderr = await process.communicate()
+        _, stderr = await process.communicate()
 
         if process.returncode != 0:
             raise Exception(f"Backup failed: {stderr.decode(errors='ignore')}")
@@ -233,8 +398,7 @@ class DatabaseManager:
             backup_path,
         ]
 
-        env = os.environ.copy()
-        env["PGPASSWORD"] = self.settings.database.password
+        env = self.pg_client_env()
 
         process = await asyncio.create_subprocess_exec(
             *cmd,
@@ -261,17 +425,63 @@ class DatabaseUtils:
         if not db.engine:
             raise RuntimeError("Database engine not initialized")
 
-        index_name = f"idx_{table}_{'_'.join(columns)}"
-        cols = ", ".join([f'"{c}"' for c in columns])
-
-        if unique:
-            query = f'CREATE UNIQUE INDEX IF NOT EXISTS "{index_name}" ON "{table}" ({cols})'
-        else:
-            query = f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table}" ({cols})'
+        query = DatabaseUtils._index_sql(table, columns, unique)
 
         async with db.engine.begin() as conn:
             await conn.execute(text(query))
 
+    @staticmethod
+    async def create_indexes(
+        db: DatabaseManager, specs: List[Tuple[str, List[str], bool]]
+    ):
+        """
+        Create several indexes in parallel from (table, columns, unique) specs.
+        Uses CREATE INDEX CONCURRENTLY, which cannot run inside a transaction,
+        so each index gets its own AUTOCOMMIT connection. INVALID leftovers
+        from an earlier failed build are dropped and rebuilt.
+        """
+        if not db.engine:
+            raise RuntimeError("Database engine not initialized")
+
+        limit = asyncio.Semaphore(db.settings.database.pool_size)
+        validity = await DatabaseUtils.get_index_validity(
+            db, [DatabaseUtils._index_name(table, columns) for table, columns, _ in specs]
+        )
+
+        async def _run(query: str):
+            async with limit:
+                async with db.engine.connect() as conn:
+                    await conn.execution_options(isolation_level="AUTOCOMMIT").execute(
+                        text(query)
+                    )
+
+        async def _create(table: str, columns: List[str], unique: bool):
+            index_name = DatabaseUtils._index_name(table, columns)
+            if validity.get(index_name) is False:
+                await _run(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"')
+            await _run(DatabaseUtils._index_sql(table, columns, unique, concurrently=True))
+
+        # TaskGroup cancels the remaining builds as soon as one fails
+        async with asyncio.TaskGroup() as tg:
+            for spec in specs:
+                tg.create_task(_create(*spec))
+
+    @staticmethod
+    def _index_name(table: str, columns: List[str]) -> str:
+        """Name used for indexes built by create_index/create_indexes"""
+        return f"idx_{table}_{'_'.join(columns)}"
+
+    @staticmethod
+    def _index_sql(
+        table: str, columns: List[str], unique: bool = False, concurrently: bool = False
+    ) -> str:
+        """Build the CREATE INDEX statement for a table/columns pair"""
+        index_name = DatabaseUtils._index_name(table, columns)
+        cols = ", ".join([f'"{c}"' for c in columns])
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        mode = " CONCURRENTLY" if concurrently else ""
+        return f'CREATE {kind}{mode} IF NOT EXISTS "{index_name}" ON "{table}" ({cols})'
+
     @staticmethod
     async def table_exists(db: DatabaseManager, table: str) -> bool:
         """Check if table exists"""
@@ -285,12 +495,30 @@ class DatabaseUtils:
         result = await db.execute_raw_query(query, {"table": table})
         return bool(result[0]["exists"]) if result else False
 
+    @staticmethod
+    async def get_index_validity(db: DatabaseManager, names: List[str]) -> Dict[str, bool]:
+        """
+        Map each existing index in the current schema to pg_index.indisvalid.
+        A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind.
+        """
+        query = """
+        SELECT c.relname AS name, i.indisvalid AS valid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = current_schema()
+        AND c.relname = ANY(:names)
+        """
+        result = await db.execute_raw_query(query, {"names": names})
+        return {row["name"]: row["valid"] for row in result}
+
     @staticmethod
     async def get_table_size(db: DatabaseManager, table: str) -> int:
         """Get table size in bytes"""
-        # pg_total_relation_size needs regclass; safest build with quotes
-        query = f'SELECT pg_total_relation_size(\'"{table}"\') AS size'
-        result = await db.execute_raw_query(query)
+        # pg_total_relation_size needs regclass: bind the quoted identifier
+        # and cast it server-side instead of formatting it into the SQL
+        query = "SELECT pg_total_relation_size(CAST(:table AS regclass)) AS size"
+        result = await db.execute_raw_query(query, {"table": f'"{table}"'})
         return int(result[0]["size"]) if result else 0
 
     @staticmethod
@@ -227,7 +227,7 @@ class Account(Base):
     __tablename__ = "accounts"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     server_id = Column(Integer, ForeignKey("servers.id"), nullable=False, index=True)
 
     # VPN credentials
@@ -244,7 +244,7 @@ class Account(Base):
 
     # Subscription details
     plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
 
     # Usage tracking
     data_used_gb = Column(Float, default=0.0, nullable=False)
@@ -310,7 +310,7 @@ class Order(Base):
 
     id = Column(Integer, primary_key=True)
     order_id = Column(String(100), unique=True, nullable=False, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False)
 
     # Payment details
@@ -349,7 +349,7 @@ class VPNSession(Base):
     __tablename__ = "vpn_sessions"
 
     id = Column(Integer, primary_key=True)
-    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
 
     # Connection info
     client_ip = Column(String(45), nullable=False)
@@ -398,7 +398,7 @@ class Ticket(Base):
 
     id = Column(Integer, primary_key=True)
     ticket_number = Column(String(50), unique=True, nullable=False, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     # Ticket info
     subject = Column(String(255), nullable=False)
@@ -500,7 +500,7 @@ class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     # Event tracking
     event_type = Column(String(100), nullable=False, index=True)
@@ -546,7 +546,6 @@ class SystemMetric(Base):
 Index("idx_users_telegram_id", User.telegram_id)
 Index("idx_users_email", User.email)
 Index("idx_accounts_user_id_status", Account.user_id, Account.status)
-Index("idx_accounts_expires_at", Account.expires_at)
 Index("idx_orders_user_id_status", Order.user_id, Order.status)
 Index("idx_vpn_sessions_account_id_active", VPNSession.account_id, VPNSession.is_active)
 Index("idx_tickets_user_id_status", Ticket.user_id, Ticket.status)
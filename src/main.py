@@ -37,7 +37,7 @@ from typing import Optional
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from core.config import Settings
+from core.config import get_settings
 from core.database import DatabaseManager
 from core.logging import setup_logging
 from services.bot import TelegramBotService
@@ -56,7 +56,7 @@ class ConnectifyVPN:
     """
     
     def __init__(self):
-        self.settings = Settings()
+        self.settings = get_settings()
         self.db = DatabaseManager(self.settings)
         self.logger = setup_logging()
         
@@ -72,6 +72,7 @@ class ConnectifyVPN:
     async def initialize(self):
         """Initialize all services and dependencies"""
         self.logger.info("🚀 Initializing ConnectifyVPN Premium Suite...")
+        self.logger.debug("Settings: %s", self.settings.to_json())
         
         # Run database migrations
         await run_migrations(self.db)
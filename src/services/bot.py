@@ -674,8 +674,8 @@ class TelegramBotService:
     # ==========================================================
     async def send_broadcast(self, text_msg: str) -> int:
         count = 0
-        async with self.db.session() as session:
-            res = await session.execute(select(User.telegram_id))
+        async with self.db.read_conn() as conn:
+            res = await conn.execute(select(User.telegram_id))
             ids = [x for x in res.scalars().all() if x]
         for tg_id in ids:
             try:
@@ -687,8 +687,8 @@ class TelegramBotService:
         return count
 
     async def count_users(self) -> int:
-        async with self.db.session() as session:
-            res = await session.execute(text("SELECT COUNT(*) FROM users"))
+        async with self.db.read_conn() as conn:
+            res = await conn.execute(text("SELECT COUNT(*) FROM users"))
             return int(res.scalar() or 0)
 
     async def get_all_servers(self) -> List[Server]:
@@ -698,20 +698,20 @@ class TelegramBotService:
 
     async def get_admin_stats(self) -> Dict[str, Any]:
         stats: Dict[str, Any] = {}
-        async with self.db.session() as session:
-            res = await session.execute(text("SELECT COUNT(*) FROM users"))
+        async with self.db.read_conn() as conn:
+            res = await conn.execute(text("SELECT COUNT(*) FROM users"))
             stats["total_users"] = int(res.scalar() or 0)
 
-            res = await session.execute(text("SELECT COUNT(*) FROM accounts WHERE status='active'"))
+            res = await conn.execute(text("SELECT COUNT(*) FROM accounts WHERE status='active'"))
             stats["active_accounts"] = int(res.scalar() or 0)
 
-            res = await session.execute(text("SELECT COALESCE(SUM(amount),0) FROM orders WHERE status='paid'"))
+            res = await conn.execute(text("SELECT COALESCE(SUM(amount),0) FROM orders WHERE status='paid'"))
             stats["total_revenue"] = float(res.scalar() or 0)
 
-            res = await session.execute(text("SELECT COUNT(*) FROM servers WHERE status='online'"))
+            res = await conn.execute(text("SELECT COUNT(*) FROM servers WHERE status='online'"))
             stats["servers_online"] = int(res.scalar() or 0)
 
-            res = await session.execute(text("SELECT COUNT(*) FROM tickets WHERE status='pending'"))
+            res = await conn.execute(text("SELECT COUNT(*) FROM tickets WHERE status='pending'"))
             stats["pending_tickets"] = int(res.scalar() or 0)
 
         # system load optional